@@ -291,7 +291,7 @@ class Controller:
             AttributeError: On setting if the argument value is not valid.
                 Can still be set even if the mode isn't appropriate.
         """
-        if value % 0.5 != 0:
+        if not float(value * 2).is_integer():
             raise AttributeError(f"SetPoint '{value}' not rounded to nearest 0.5")
         if value < self.temp_min or value > self.temp_max:
             raise AttributeError(f"SetPoint '{value}' is out of range")
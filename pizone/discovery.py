@@ -2,20 +2,26 @@
 
 import asyncio
 import logging
+import re
+import socket
+import sys
 from abc import ABC, abstractmethod
 from asyncio import (
     CancelledError,
-    Condition,
     DatagramProtocol,
     DatagramTransport,
+    Event,
     Future,
     Task,
 )
+from functools import partial
 from logging import Logger
-from typing import Dict, List, Optional, Set
+from operator import methodcaller
+from time import monotonic
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
 
 import netifaces # type: ignore
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 from async_timeout import timeout
 
 from .controller import Controller
@@ -25,6 +31,7 @@ DISCOVERY_MSG = b"IASD"
 DISCOVERY_PORT = 12107
 
 UPDATE_PORT = 7005
+UPDATE_RCVBUF = 4 * 1024 * 1024
 CHANGED_SYSTEM = b"iZoneChanged_System"
 CHANGED_ZONES = b"iZoneChanged_Zones"
 CHANGED_SCHEDULES = b"iZoneChanged_Schedules"
@@ -32,12 +39,26 @@ CHANGED_SCHEDULES = b"iZoneChanged_Schedules"
 DISCOVERY_TIMEOUT = 2.0
 DISCOVERY_SLEEP = 5.0 * 60.0
 DISCOVERY_RESCAN = 20.0
+BROADCAST_CACHE_TTL = 60.0
+
+# Discovery reply: ASPort_12107,Mac_<uid>,IP_<ip>[,<tag>...]
+# The uid and ip groups only accept ASCII, so decoding them can't fail.
+_DISCOVERY_REPLY = re.compile(
+    rb"ASPort_12107,[^,_]*_([0-9A-Za-z]+)(?:_[^,]*)?,"
+    rb"[^,_]*_([0-9.]+)(?:_[^,]*)?(?:,(.*))?",
+    re.DOTALL,
+)
+_IZONE_TAGS = frozenset((b"iZone", b"iZoneV2"))
 
 _LOG = logging.getLogger("pizone.discovery")  # type: Logger
 
 
 class LogExceptions:
-    """Utility context manager to log and discard exceptions"""
+    """Utility context manager to log and discard exceptions.
+
+    Holds no per-call state, so a single instance can be reused."""
+
+    __slots__ = ("func",)
 
     def __init__(self, func: str) -> None:
         self.func = func
@@ -53,6 +74,14 @@ class LogExceptions:
         return True
 
 
+_GUARD_DISCOVERED = LogExceptions("controller_discovered")
+_GUARD_DISCONNECTED = LogExceptions("controller_disconnected")
+_GUARD_RECONNECTED = LogExceptions("controller_reconnected")
+_GUARD_CONTROLLER_UPDATE = LogExceptions("controller_update")
+_GUARD_ZONE_UPDATE = LogExceptions("zone_update")
+_GUARD_POWER_UPDATE = LogExceptions("power_update")
+
+
 class Listener:
     """Base class for listeners for iZone updates"""
 
@@ -145,8 +174,10 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
                           already running.
         """
         self._controllers = {}  # type: Dict[str, Controller]
+        self._by_ip = {}  # type: Dict[str, Controller]
         self._disconnected = set()  # type: Set[str]
-        self._listeners = []  # type: List[Listener]
+        # Replaced rather than mutated, so dispatch can iterate it safely.
+        self._listeners = ()  # type: Tuple[Listener, ...]
         self._close_task = None  # type: Optional[Task]
 
         _LOG.info("Starting discovery protocol")
@@ -154,10 +185,24 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         self._own_session = session is None
 
         self._transport = None  # type: Optional[DatagramTransport]
+        self._broadcasts = None  # type: Optional[Tuple[Tuple[str, int], ...]]
+        self._broadcasts_time = 0.0
 
-        self._scan_condition = Condition()  # type: Condition
+        self._scan_event = Event()  # type: Event
 
-        self._tasks = []  # type: List[Future]
+        self._tasks = set()  # type: Set[Future]
+
+        # In flight and queued datagram refreshes, keyed by (uid, kind).
+        self._refreshing = set()  # type: Set[Tuple[str, str]]
+        self._pending_refresh = set()  # type: Set[Tuple[str, str]]
+
+        # Handlers for fixed datagrams, anything else is a discovery reply.
+        self._dispatch = {
+            DISCOVERY_MSG: self._ignore_datagram,
+            CHANGED_SCHEDULES: self._ignore_datagram,
+            CHANGED_SYSTEM: self._on_changed_system,
+            CHANGED_ZONES: self._on_changed_zones,
+        }  # type: Dict[bytes, Callable[[Tuple[str, int]], None]]
 
     # Async context manager interface
     async def __aenter__(self) -> DiscoveryService:
@@ -169,17 +214,24 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
 
     def _task_done_callback(self, task):
         try:
-            if task.exception():
-                _LOG.exception("Uncaught exception", exc_info=task.exception())
+            ex = task.exception()
+            if isinstance(ex, ConnectionError):
+                _LOG.warning(
+                    "Unable to complete %s due to connection error",
+                    task.get_coro(),
+                    exc_info=ex,
+                )
+            elif ex:
+                _LOG.exception("Uncaught exception", exc_info=ex)
         except CancelledError:
             pass
-        self._tasks.remove(task)
+        self._tasks.discard(task)
 
     # managing the task list.
     def create_task(self, coro) -> Task:
         """Create a task in the event loop. Keeps track of created tasks."""
         task = asyncio.get_running_loop().create_task(coro)  # type: Task
-        self._tasks.append(task)
+        self._tasks.add(task)
 
         task.add_done_callback(self._task_done_callback)
         return task
@@ -189,23 +241,46 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         """Add a discovered listener.
 
         All existing controllers will be passed to the listener."""
-        self._listeners.append(listener)
-
-        def callback():
-            for controller in self._controllers.values():
-                listener.controller_discovered(controller)
+        self._listeners += (listener,)
+        # Snapshot both sides at the time of the change: controllers known
+        # now are replayed here, later ones reach the listener through the
+        # fan-out, so each is reported exactly once.
+        asyncio.get_running_loop().call_soon(
+            self._notify_existing, listener, tuple(self._controllers.values())
+        )
 
-        asyncio.get_running_loop().call_soon(callback)
+    @staticmethod
+    def _notify_existing(listener: Listener, controllers: Tuple[Controller, ...]):
+        for controller in controllers:
+            listener.controller_discovered(controller)
 
     def remove_listener(self, listener: Listener) -> None:
         """Remove a listener"""
-        self._listeners.remove(listener)
+        listeners = list(self._listeners)
+        listeners.remove(listener)
+        self._listeners = tuple(listeners)
+
+    def _notify_listeners(self, guard: LogExceptions, event: str, *args) -> None:
+        # Every listener callback goes through one FIFO of loop callbacks,
+        # so listeners can't hold up the datagram / refresh path that
+        # raised the event, and still hear about events in order.
+        # The listeners are captured now, so one added before the callback
+        # runs doesn't also get an event it will be told about on adding.
+        asyncio.get_running_loop().call_soon(
+            self._fan_out, self._listeners, guard, methodcaller(event, *args)
+        )
+
+    @staticmethod
+    def _fan_out(
+        listeners: Tuple[Listener, ...], guard: LogExceptions, call: methodcaller
+    ) -> None:
+        for listener in listeners:
+            with guard:
+                call(listener)
 
     def controller_discovered(self, ctrl: Controller) -> None:
         _LOG.info("New controller found: id=%s ip=%s", ctrl.device_uid, ctrl.device_ip)
-        for listener in self._listeners:
-            with LogExceptions("controller_discovered"):
-                listener.controller_discovered(ctrl)
+        self._notify_listeners(_GUARD_DISCOVERED, "controller_discovered", ctrl)
 
     def controller_disconnected(self, ctrl: Controller, ex: Exception) -> None:
         _LOG.warning(
@@ -214,34 +289,24 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
             ctrl.device_ip,
         )
         self._disconnected.add(ctrl.device_uid)
-        self.create_task(self._rescan())
-        for listener in self._listeners:
-            with LogExceptions("controller_disconnected"):
-                listener.controller_disconnected(ctrl, ex)
+        self._scan_event.set()
+        self._notify_listeners(_GUARD_DISCONNECTED, "controller_disconnected", ctrl, ex)
 
     def controller_reconnected(self, ctrl: Controller) -> None:
         _LOG.warning(
             "Controller reconnected: id=%s ip=%s", ctrl.device_uid, ctrl.device_ip
         )
         self._disconnected.remove(ctrl.device_uid)
-        for listener in self._listeners:
-            with LogExceptions("controller_reconnected"):
-                listener.controller_reconnected(ctrl)
+        self._notify_listeners(_GUARD_RECONNECTED, "controller_reconnected", ctrl)
 
     def controller_update(self, ctrl: Controller) -> None:
-        for listener in self._listeners:
-            with LogExceptions("controller_update"):
-                listener.controller_update(ctrl)
+        self._notify_listeners(_GUARD_CONTROLLER_UPDATE, "controller_update", ctrl)
 
     def zone_update(self, ctrl: Controller, zone: Zone) -> None:
-        for listener in self._listeners:
-            with LogExceptions("zone_update"):
-                listener.zone_update(ctrl, zone)
+        self._notify_listeners(_GUARD_ZONE_UPDATE, "zone_update", ctrl, zone)
 
     def power_update(self, ctrl: Controller) -> None:
-        for listener in self._listeners:
-            with LogExceptions("power_update"):
-                listener.power_update(ctrl)
+        self._notify_listeners(_GUARD_POWER_UPDATE, "power_update", ctrl)
 
     @property
     def controllers(self) -> Dict[str, Controller]:
@@ -250,12 +315,33 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
 
     # Non-context versions of starting.
     async def start_discovery(self) -> None:
-        if self._own_session:
-            self.session = ClientSession()
+        if self._own_session and self.session is None:
+            # Requests to a controller are serialised, so a couple of
+            # connections per host is plenty.
+            self.session = ClientSession(
+                connector=TCPConnector(limit=16, limit_per_host=2, ttl_dns_cache=300)
+            )
         await asyncio.get_running_loop().create_datagram_endpoint(
-            lambda: self, local_addr=("0.0.0.0", UPDATE_PORT), allow_broadcast=True
+            lambda: self, sock=self._create_update_socket()
         )
 
+    @staticmethod
+    def _create_update_socket() -> socket.socket:
+        # Set up the socket by hand so every option is applied before bind.
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # No SO_REUSEADDR/SO_REUSEPORT: a second service on this port
+            # would silently miss unicast replies, better to fail to bind.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            # Give the kernel room to queue bursts of change notifications.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UPDATE_RCVBUF)
+            sock.setblocking(False)
+            sock.bind(("0.0.0.0", UPDATE_PORT))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
     def connection_made(self, transport: DatagramTransport) -> None:  # type: ignore  # noqa: E501
         if self._close_task:
             transport.close()
@@ -265,20 +351,34 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         self._transport = transport
         self.create_task(self._scan_loop())
 
-    def _get_broadcasts(self):
-        for ifaddr in map(netifaces.ifaddresses, netifaces.interfaces()):
-            inetaddrs = ifaddr.get(netifaces.AF_INET)
-            if not inetaddrs:
-                continue
-            for inetaddr in inetaddrs:
-                broadcast = inetaddr.get("broadcast")
-                if broadcast:
-                    yield broadcast
+    def _get_broadcasts(self) -> Tuple[Tuple[str, int], ...]:
+        # Enumerating interfaces is a handful of syscalls per interface,
+        # so only do it once per BROADCAST_CACHE_TTL.
+        now = monotonic()
+        if (
+            self._broadcasts is None
+            or now - self._broadcasts_time >= BROADCAST_CACHE_TTL
+        ):
+            # Bridged and virtual interfaces often share a broadcast address,
+            # and link-local (APIPA) ones never reach a controller.
+            broadcasts = dict.fromkeys(
+                inetaddr.get("broadcast")
+                for ifaddr in map(netifaces.ifaddresses, netifaces.interfaces())
+                for inetaddr in ifaddr.get(netifaces.AF_INET, ())
+            )
+            self._broadcasts = tuple(
+                (broadcast, DISCOVERY_PORT)
+                for broadcast in broadcasts
+                if broadcast and not broadcast.startswith("169.254.")
+            )
+            self._broadcasts_time = now
+        return self._broadcasts
 
     def _send_broadcasts(self):
-        for broadcast in self._get_broadcasts():
-            _LOG.debug("Sending discovery message to addr %s", broadcast)
-            self._transport.sendto(DISCOVERY_MSG, (broadcast, DISCOVERY_PORT))
+        sendto = self._transport.sendto
+        for target in self._get_broadcasts():
+            _LOG.debug("Sending discovery message to addr %s", target[0])
+            sendto(DISCOVERY_MSG, target)
 
     async def _scan_loop(self) -> None:
         assert self._transport, "Should be impossible"
@@ -290,10 +390,10 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
                 async with timeout(
                     DISCOVERY_RESCAN if self._disconnected else DISCOVERY_SLEEP
                 ):
-                    async with self._scan_condition:
-                        await self._scan_condition.wait()
+                    await self._scan_event.wait()
             except asyncio.TimeoutError:
                 pass
+            self._scan_event.clear()
 
             if self._close_task:
                 return
@@ -302,11 +402,7 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         if self.is_closed:
             raise ConnectionError("Already closed")
         _LOG.debug("Manual rescan of controllers triggered.")
-        await self._rescan()
-
-    async def _rescan(self) -> None:
-        async with self._scan_condition:
-            self._scan_condition.notify()
+        self._scan_event.set()
 
     # Closing the connection
     async def close(self) -> None:
@@ -315,20 +411,25 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
             await self._close_task
             return
         _LOG.info("Close called on discovery service.")
-        self._close_task = asyncio.current_task()
         if self._transport:
             self._transport.close()
+        self._scan_event.set()
+        self._close_task = asyncio.get_running_loop().create_task(self._do_close())
+        await self._close_task
 
+    async def _do_close(self) -> None:
         for i in self._tasks:
             i.cancel()
 
-        if self._own_session and self.session:
-            await self.session.close()
-
-        await asyncio.wait(self._tasks)
+        try:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            if self._own_session and self.session:
+                await self.session.close()
 
     def connection_lost(self, exc):
         _LOG.debug("Connection Lost")
+        self._broadcasts = None
         if not self._close_task:
             _LOG.error("Connection Lost unexpectedly: %s", repr(exc))
             asyncio.get_running_loop().create_task(self.close())
@@ -340,21 +441,11 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         return self._close_task is not None
 
     def error_received(self, exc):
+        self._broadcasts = None
         _LOG.warning("Error passed and ignored to error_recieved", exc_info=True)
 
     def _find_by_addr(self, addr: str) -> Optional[Controller]:
-        for _, ctrl in self._controllers.items():
-            if ctrl.device_ip == addr[0]:
-                return ctrl
-        return None
-
-    async def _wrap_update(self, coro):
-        try:
-            await coro
-        except ConnectionError:
-            _LOG.warning(
-                "Unable to complete %s due to connection error", coro, exc_info=True
-            )
+        return self._by_ip.get(addr[0])
 
     def datagram_received(self, data, addr):
         _LOG.debug("Datagram Recieved %s", data)
@@ -363,66 +454,92 @@ class _DiscoveryServiceImpl(DiscoveryService, DatagramProtocol, Listener):
         self._process_datagram(data, addr)
 
     def _process_datagram(self, data, addr):
-        if data in (DISCOVERY_MSG, CHANGED_SCHEDULES):
-            # ignore
-            pass
-        elif data == CHANGED_SYSTEM:
-            ctrl = self._find_by_addr(addr)
-            if ctrl:
-                # pylint: disable=protected-access
-                self.create_task(self._wrap_update(ctrl._refresh_system()))
-        elif data == CHANGED_ZONES:
-            ctrl = self._find_by_addr(addr)
-            if ctrl:
-                # pylint: disable=protected-access
-                self.create_task(self._wrap_update(ctrl._refresh_zones()))
-        else:
+        handler = self._dispatch.get(data)
+        if handler:
+            handler(addr)
+        elif data.startswith(b"ASPort_"):
             self._discovery_recieved(data)
+        # Anything else is unrelated broadcast traffic on the LAN.
+
+    def _ignore_datagram(self, addr):
+        pass
+
+    def _on_changed_system(self, addr):
+        ctrl = self._find_by_addr(addr)
+        if ctrl:
+            # pylint: disable=protected-access
+            self._schedule_refresh((ctrl.device_uid, "system"), ctrl._refresh_system)
+
+    def _on_changed_zones(self, addr):
+        ctrl = self._find_by_addr(addr)
+        if ctrl:
+            # pylint: disable=protected-access
+            self._schedule_refresh((ctrl.device_uid, "zones"), ctrl._refresh_zones)
+
+    def _schedule_refresh(
+        self, key: Tuple[str, str], refresh: Callable[[], Awaitable[None]]
+    ) -> None:
+        # Controllers send a burst of change messages for a single user
+        # action. Rather than a request per message, run one refresh and
+        # queue at most one more to pick up changes made while in flight.
+        if key in self._refreshing:
+            self._pending_refresh.add(key)
+            return
+        self._refreshing.add(key)
+        task = self.create_task(refresh())
+        task.add_done_callback(partial(self._refresh_done, key, refresh))
+
+    def _refresh_done(self, key, refresh, _task) -> None:
+        self._refreshing.discard(key)
+        if key in self._pending_refresh:
+            self._pending_refresh.discard(key)
+            if not self._close_task:
+                self._schedule_refresh(key, refresh)
 
     def _discovery_recieved(self, data):
-        message = data.decode().split(",")
-        if (
-            len(message) < 3
-            or message[0] != "ASPort_12107"
-            or (len(message) >= 4 and {"iZone", "iZoneV2"}.isdisjoint(message[3:]))
-        ):
-            _LOG.warning("Invalid Message Received: %s", data.decode())
+        match = _DISCOVERY_REPLY.fullmatch(data)
+        tags = [] if match is None or match[3] is None else match[3].split(b",")
+        if not match or (tags and _IZONE_TAGS.isdisjoint(tags)):
+            _LOG.warning("Invalid Message Received: %s", data.decode(errors="replace"))
             return
 
-        device_uid = message[1].split("_")[1]
-        device_ip = message[2].split("_")[1]
+        device_uid = match[1].decode()
+        # Interned so the controller and the _by_ip index share one string.
+        device_ip = sys.intern(match[2].decode())
 
         # pylint: disable=protected-access
         if device_uid not in self._controllers:
             # Create new controller.
             # We don't have to set the loop here since it's set for
             # the thread already.
-            is_v2 = len(message) >= 4 and "iZoneV2" in message[3:]
-            is_ipower = len(message) >= 4 and "iPower" in message[3:]
+            is_v2 = b"iZoneV2" in tags
+            is_ipower = b"iPower" in tags
             controller = self._create_controller(
                 device_uid, device_ip, is_v2, is_ipower
             )
-
-            async def initialize_controller():
-                try:
-                    await controller._initialize()  # noqa: E501
-                except ConnectionError as ex:
-                    _LOG.warning(
-                        "Can't connect to discovered server at IP '%s'"
-                        " exception: %s",
-                        device_ip,
-                        repr(ex),
-                    )
-                    return
-
-                self._controllers[device_uid] = controller
-                self.controller_discovered(controller)
-
-            self.create_task(initialize_controller())
+            self.create_task(self._initialize_controller(controller))
         else:
             controller = self._controllers[device_uid]
+            if self._by_ip.get(controller.device_ip) is controller:
+                del self._by_ip[controller.device_ip]
+            self._by_ip[device_ip] = controller
             controller._refresh_address(device_ip)
 
+    async def _initialize_controller(self, controller: Controller) -> None:
+        try:
+            await controller._initialize()  # pylint: disable=protected-access
+        except ConnectionError as ex:
+            _LOG.warning(
+                "Can't connect to discovered server at IP '%s' exception: %s",
+                controller.device_ip,
+                repr(ex),
+            )
+            return
+
+        self._controllers[controller.device_uid] = controller
+        self._by_ip[controller.device_ip] = controller
+        self.controller_discovered(controller)
+
     def _create_controller(self, device_uid, device_ip, is_v2, is_ipower):
         return Controller(
             self,
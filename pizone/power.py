@@ -9,8 +9,7 @@ from __future__ import annotations
 import json
 import logging
 from enum import IntEnum, unique
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
-
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 _LOG = logging.getLogger("pizone.power")
 
@@ -35,19 +34,28 @@ class BatteryLevel(IntEnum):
 class PowerChannel:
     """Channel within power device"""
 
+    __slots__ = (
+        "_device",
+        "_index",
+        "_config",
+        "_status",
+        "_enabled",
+        "_name",
+        "_group_number",
+        "_add_to_total",
+    )
+
     def __init__(self, device: PowerDevice, index: int):
         self._device = device
         self._index = index
-
-    @property
-    def _config(self) -> Dict[str, Any]:
-        # pylint: disable=protected-access
-        return self._device._config["Channels"][self._index]
-
-    @property
-    def _status(self) -> Dict[str, Any]:
-        # pylint: disable=protected-access
-        return self._device._status["Ch"][self._index]
+        # Bound to this channel's part of the power data by Power.
+        self._config = {}  # type: Dict[str, Any]
+        self._status = {}  # type: Dict[str, Any]
+        # Config only changes on Power.init, so these are decoded up front.
+        self._enabled = False
+        self._name = ""
+        self._group_number = None  # type: Optional[int]
+        self._add_to_total = False
 
     @property
     def device(self) -> PowerDevice:
@@ -62,18 +70,17 @@ class PowerChannel:
     @property
     def enabled(self) -> bool:
         """Add to group total."""
-        return bool(self._config["Enabled"])
+        return self._enabled
 
     @property
     def name(self) -> str:
         """Power channel name."""
-        return self._config["Name"]
+        return self._name
 
     @property
     def group_number(self) -> Optional[int]:
         """Group number"""
-        num = self._config["GrNo"]
-        return num if num < 255 else None
+        return self._group_number
 
     @property
     def generate(self) -> bool:
@@ -83,7 +90,7 @@ class PowerChannel:
     @property
     def add_to_total(self) -> bool:
         """Add to group total"""
-        return bool(self._config["AddToTotal"])
+        return self._add_to_total
 
     @property
     def status_power(self) -> int:
@@ -94,20 +101,16 @@ class PowerChannel:
 class PowerDevice:
     """Device for power information."""
 
+    __slots__ = ("_power", "_index", "_channels", "_config", "_status", "_enabled")
+
     def __init__(self, power: Power, index: int):
         self._power = power
         self._index = index
         self._channels = tuple(PowerChannel(self, i) for i in range(0, 3))
-
-    @property
-    def _config(self) -> Dict[str, Any]:
-        # pylint: disable=protected-access
-        return self._power._config["Devices"][self._index]
-
-    @property
-    def _status(self) -> Dict[str, Any]:
-        # pylint: disable=protected-access
-        return self._power._status["Dev"][self._index]
+        # Bound to this device's part of the power data by Power.
+        self._config = {}  # type: Dict[str, Any]
+        self._status = {}  # type: Dict[str, Any]
+        self._enabled = False
 
     @property
     def index(self) -> int:
@@ -117,7 +120,7 @@ class PowerDevice:
     @property
     def enabled(self) -> bool:
         """Enabled flag"""
-        return bool(self._config["Enabled"])
+        return self._enabled
 
     @property
     def status_ok(self) -> bool:
@@ -138,14 +141,13 @@ class PowerDevice:
 class PowerGroup:
     """Grouped power devices"""
 
+    __slots__ = ("_power", "_channels", "_devices")
+
     def __init__(self, power: Power, channels: Iterable[PowerChannel]):
         self._power = power
         self._channels = tuple(channels)
-        # get unique devices
-        devices: Set[PowerDevice] = set()
-        for chan in channels:
-            devices.add(chan.device)
-        self._devices = tuple(devices)
+        # unique devices, in channel order
+        self._devices = tuple(dict.fromkeys(chan.device for chan in self._channels))
 
     @property
     def group_number(self) -> int:
@@ -182,11 +184,13 @@ class Power:
     async def init(self) -> None:
         """Initialise the power settings."""
         self._config = await self._do_request(1, "PowerMonitorConfig")
+        self._bind_config()
         gdict: Dict[int, List[PowerChannel]] = {}
-        for dev in self.devices:
+        for dev in self._devices:
             for chan in dev.channels:
-                if chan.group_number is not None:
-                    gdict.setdefault(chan.group_number, []).append(chan)
+                group_number = chan.group_number
+                if group_number is not None:
+                    gdict.setdefault(group_number, []).append(chan)
         self._groups = tuple(PowerGroup(self, gl) for gl in gdict.values())
 
     async def refresh(self) -> bool:
@@ -197,14 +201,45 @@ class Power:
             return False
 
         self._status = status
+        self._bind_status()
         return True
 
+    def _bind_config(self) -> None:
+        # Hand each device and channel its own sub-dict so property reads
+        # are a single lookup rather than a walk from the top level, and
+        # decode the fields that stay fixed until the next init.
+        # pylint: disable=protected-access
+        for dev, dev_config in zip(self._devices, self._config["Devices"]):
+            dev._config = dev_config
+            dev._enabled = bool(dev_config["Enabled"])
+            for chan, chan_config in zip(dev._channels, dev_config["Channels"]):
+                chan._config = chan_config
+                chan._enabled = bool(chan_config["Enabled"])
+                chan._name = chan_config["Name"]
+                group_number = chan_config["GrNo"]
+                chan._group_number = group_number if group_number < 255 else None
+                chan._add_to_total = bool(chan_config["AddToTotal"])
+
+    def _bind_status(self) -> None:
+        # pylint: disable=protected-access
+        for dev, dev_status in zip(self._devices, self._status["Dev"]):
+            dev._status = dev_status
+            for chan, chan_status in zip(dev._channels, dev_status["Ch"]):
+                chan._status = chan_status
+
     async def _do_request(self, req_type: int, result: str) -> Dict[str, Any]:
         # pylint: disable=protected-access
         datas = await self._controller._send_command_async(
             "PowerRequest", {"PowerRequest": {"Type": req_type, "No": 0, "No1": 0}}
         )
-        data = json.loads(datas)
+        # _send_command_async has already stripped any trailing {OK}
+        try:
+            data = json.loads(datas)
+        except json.JSONDecodeError as ex:
+            _LOG.error('Decode error for "%s"', datas, exc_info=True)
+            raise ConnectionError(
+                "Unable to decode response from the controller"
+            ) from ex
         return data[result]
 
     @property
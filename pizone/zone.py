@@ -37,10 +37,26 @@ class Zone:
     DictValue = Union[str, int, float]
     ZoneData = Dict[str, DictValue]
 
+    __slots__ = (
+        "_zone_data",
+        "_zone_get",
+        "_index",
+        "_controller",
+        "_zone_no",
+        "_type",
+        "_mode",
+    )
+
     def __init__(self, controller, index: int) -> None:
         self._zone_data = {}  # type: Dict
+        self._zone_get = self._zone_data.__getitem__
         self._index = index
         self._controller = controller
+        # The controller numbers zones from one in commands.
+        self._zone_no = str(index + 1)
+        # Decoded from _zone_data on first read, cleared when it changes.
+        self._type = None  # type: Optional[Zone.Type]
+        self._mode = None  # type: Optional[Zone.Mode]
 
     @property
     def index(self) -> int:
@@ -59,7 +75,10 @@ class Zone:
         'opcl' – the zone is open/close only
         'const' – the zone is a constant zone
         """
-        return self.Type(self._get_zone_state("Type"))
+        self._ensure_connected()
+        if self._type is None:
+            self._type = Zone.Type(self._zone_get("Type"))
+        return self._type
 
     @property
     def mode(self) -> "Mode":
@@ -68,7 +87,10 @@ class Zone:
         'close' – the zone is currently closed
         'auto' – the zone is currently in temperature control mode
         """
-        return self.Mode(self._get_zone_state("Mode"))
+        self._ensure_connected()
+        if self._mode is None:
+            self._mode = Zone.Mode(self._zone_get("Mode"))
+        return self._mode
 
     @property
     def temp_setpoint(self) -> Optional[float]:
@@ -130,15 +152,18 @@ class Zone:
         Raises:
             AttributeError if the set point is out of range
         """
-        if self.type != Zone.Type.AUTO:
-            raise AttributeError(f"Can't set SetPoint to '{self.type}' type zone.")
-        if value % 0.5 != 0:
+        zone_type = self.type
+        if zone_type != Zone.Type.AUTO:
+            raise AttributeError(f"Can't set SetPoint to '{zone_type}' type zone.")
+        if not float(value * 2).is_integer():
             raise AttributeError(f"SetPoint '{value}' not rounded to nearest 0.5")
-        if value < self._controller.temp_min or value > self._controller.temp_max:
+        controller = self._controller
+        if not controller.temp_min <= value <= controller.temp_max:
             raise AttributeError(f"SetPoint '{value}' is out of range")
 
         await self._send_command("ZoneCommand", value)
         self._zone_data["Mode"] = "auto"
+        self._mode = Zone.Mode.AUTO
         self._zone_data["SetPoint"] = value
         self._fire_listeners()
 
@@ -153,16 +178,33 @@ class Zone:
             if self.type != Zone.Type.AUTO:
                 raise AttributeError("Can't use auto mode on open/close zone.")
             await self._send_command("ZoneCommand", self._get_zone_state("SetPoint"))
-            self._zone_data["Mode"] = "auto"
         else:
             await self._send_command("ZoneCommand", value.value)
-            self._zone_data["Mode"] = value.value
+        self._zone_data["Mode"] = value.value
+        self._mode = value
         self._fire_listeners()
 
+    def snapshot(self) -> "ZoneData":
+        """A copy of the raw zone data, checking the connection only once.
+
+        Useful when reading several fields together.
+        Raises:
+            ConnectionError if the controller is disconnected
+        """
+        self._ensure_connected()
+        return dict(self._zone_data)
+
     def _update_zone(self, zone_data, notify: bool = True):
         if zone_data["Index"] != self._index:
             raise AttributeError("Can't change index of existing zone.")
+        if zone_data == self._zone_data:
+            # Most refreshes are no-ops, don't wake the listeners for them.
+            return
         self._zone_data = zone_data
+        self._zone_get = zone_data.__getitem__
+        # Decode lazily, so an unknown value only fails reads of this zone.
+        self._type = None
+        self._mode = None
         if notify:
             self._fire_listeners()
 
@@ -170,11 +212,14 @@ class Zone:
         # pylint: disable=protected-access
         self._controller._discovery.zone_update(self._controller, self)
 
+    def _ensure_connected(self) -> None:
+        self._controller._ensure_connected()  # pylint: disable=protected-access
+
     def _get_zone_state(self, state):
-        self._controller._ensure_connected()  # pylint: disable=protected-access  # noqa
-        return self._zone_data[state]
+        self._ensure_connected()
+        return self._zone_get(state)
 
     async def _send_command(self, command, data: Union[str, float, int]):
-        send_data = {command: {"ZoneNo": str(self._index + 1), "Command": str(data)}}
+        send_data = {command: {"ZoneNo": self._zone_no, "Command": str(data)}}
         # pylint: disable=protected-access
         await self._controller._send_command_async(command, send_data)
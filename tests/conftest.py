@@ -1,5 +1,4 @@
 from asyncio import Event, wait_for
-from copy import deepcopy
 from typing import Any, Dict, List, Tuple
 from unittest.mock import AsyncMock
 
@@ -8,6 +7,15 @@ from pizone.discovery import CHANGED_SYSTEM, CHANGED_ZONES, _DiscoveryServiceImp
 from pytest import fixture
 
 
+def _fast_clone(value):
+    """Copy plain JSON-style data without the overhead of deepcopy."""
+    if isinstance(value, dict):
+        return {k: _fast_clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fast_clone(v) for v in value]
+    return value
+
+
 class MockController(Controller):
     def __init__(
         self, discovery, device_uid: str, device_ip: str, is_v2: bool, is_ipower: bool
@@ -15,7 +23,7 @@ class MockController(Controller):
         super().__init__(discovery, device_uid, device_ip, is_v2, is_ipower)
         from .resources import SYSTEMS
 
-        self.resources = deepcopy(SYSTEMS[device_uid])  # type: Dict[str,Any]
+        self.resources = _fast_clone(SYSTEMS[device_uid])  # type: Dict[str,Any]
         self.sent = []  # type: List[Tuple[str,Any]]
         self._connected = True
 
@@ -30,8 +38,8 @@ class MockController(Controller):
         self._check_connected()
         result = self.resources.get(resource)
         if result:
-            return deepcopy(result)
-        raise ConnectionError("Mock resource '{}' not available".format(resource))
+            return _fast_clone(result)
+        raise ConnectionError(f"Mock resource '{resource}' not available")
 
     async def _send_command_async(self, command: str, data: Any):
         """Mock out the network IO for _send_command."""
@@ -44,7 +52,7 @@ class MockController(Controller):
 
     async def change_zone_state(self, zone: int, state: str, value: Any) -> None:
         idx = zone % 4
-        segment = "Zones{}_{}".format(zone - idx, zone - idx + 4)
+        segment = f"Zones{zone - idx}_{zone - idx + 4}"
         self.resources[segment][idx][state] = value
         await self.discovery._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
 
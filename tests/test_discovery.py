@@ -1,8 +1,8 @@
-from asyncio import sleep
+from asyncio import Event, sleep, wait_for
 from unittest.mock import patch
 
 from pizone import Controller, Listener, discovery
-from pizone.discovery import _DiscoveryServiceImpl
+from pizone.discovery import CHANGED_ZONES, _DiscoveryServiceImpl
 from pytest import raises
 
 
@@ -106,6 +106,18 @@ async def test_ip_addr_change(service, caplog):
     await sleep(0)
 
     assert controller.device_ip == "8.8.8.4"
+    assert service._find_by_addr(("8.8.8.4", 12107)) is controller
+    assert service._find_by_addr(("8.8.8.8", 12107)) is None
+
+
+async def test_invalid_discovery_reply(service, caplog):
+    service._process_datagram(
+        b"ASPort_12107,Mac_\xff\xfe,IP_8.8.8.8,iZone", ("8.8.8.8", 12107)
+    )
+    await sleep(0)
+
+    assert caplog.messages[-1][:25] == "Invalid Message Received:"
+    assert list(service.controllers) == ["000000001"]
 
 
 async def test_reconnect(service, caplog):
@@ -120,11 +132,17 @@ async def test_reconnect(service, caplog):
     assert caplog.messages[0][:30] == "Connection to controller lost:"
     assert not controller.sent
 
+    reconnected = Event()
+
+    class ReconnectListener(Listener):
+        def controller_reconnected(self, ctrl: Controller) -> None:
+            reconnected.set()
+
+    service.add_listener(ReconnectListener())
     service._process_datagram(
         b"ASPort_12107,Mac_000000001,IP_8.8.8.8,iZone,iLight,iDrate", ("8.8.8.8", 12107)
     )
-
-    await sleep(0.1)
+    await wait_for(reconnected.wait(), 1)
 
     # Reconnect OK
     assert caplog.messages[1][:23] == "Controller reconnected:"
@@ -136,16 +154,20 @@ async def test_reconnect_listener(service):
     controller = service.controllers["000000001"]  # type: Controller
 
     calls = []
+    called = Event()
 
     class TestListener(Listener):
         def controller_discovered(self, ctrl: Controller) -> None:
             calls.append(("discovered", ctrl))
+            called.set()
 
         def controller_disconnected(self, ctrl: Controller, ex: Exception) -> None:
             calls.append(("disconnected", ctrl, ex))
+            called.set()
 
         def controller_reconnected(self, ctrl: Controller) -> None:
             calls.append(("reconnected", ctrl))
+            called.set()
 
     listener = TestListener()
 
@@ -155,25 +177,29 @@ async def test_reconnect_listener(service):
     assert len(calls) == 1
     assert calls[-1] == ("discovered", controller)
 
+    called.clear()
     controller._failed_connection(ConnectionError("Fake connection error"))
     with raises(ConnectionError):
         await controller.set_mode(Controller.Mode.COOL)
+    await wait_for(called.wait(), 1)
 
     assert len(calls) == 2
     assert calls[-1][0:2] == ("disconnected", controller)
 
+    called.clear()
     service._process_datagram(
         b"ASPort_12107,Mac_000000001,IP_8.8.8.8,iZone,iLight,iDrate", ("8.8.8.8", 12107)
     )
-    await sleep(0.1)
+    await wait_for(called.wait(), 1)
 
     assert len(calls) == 3
     assert calls[-1] == ("reconnected", controller)
 
+    called.clear()
     service._process_datagram(
         b"ASPort_12107,Mac_000000002,IP_8.8.8.4,iZone,iLight,iDrate", ("8.8.8.8", 12107)
     )
-    await sleep(0.1)
+    await wait_for(called.wait(), 1)
     controller2 = service.controllers["000000002"]  # type: Controller
 
     assert len(calls) == 4
@@ -184,5 +210,96 @@ async def test_reconnect_listener(service):
     controller._failed_connection(ConnectionError("Fake connection error"))
     with raises(ConnectionError):
         await controller.set_mode(Controller.Mode.COOL)
+    await sleep(0)
 
     assert len(calls) == 4
+
+
+async def test_listener_added_during_discovery(service):
+    discovered = []
+    done = Event()
+
+    class LateListener(Listener):
+        def controller_discovered(self, ctrl: Controller) -> None:
+            discovered.append(ctrl.device_uid)
+            done.set()
+
+    listener = LateListener()
+    notify = service.controller_discovered
+
+    def controller_discovered(ctrl: Controller) -> None:
+        # Add the listener after the controller is registered and its
+        # notification queued, but before the notification has run.
+        notify(ctrl)
+        service.add_listener(listener)
+
+    service.controller_discovered = controller_discovered
+    service._process_datagram(
+        b"ASPort_12107,Mac_000000002,IP_8.8.8.4,iZone,iLight,iDrate", ("8.8.8.4", 12107)
+    )
+    await wait_for(done.wait(), 1)
+    await sleep(0)
+
+    assert discovered.count("000000002") == 1
+
+
+async def test_reconnect_callback_order(service):
+    controller = service.controllers["000000001"]  # type: Controller
+
+    events = []
+    reconnected = Event()
+
+    class OrderListener(Listener):
+        def controller_disconnected(self, ctrl: Controller, ex: Exception) -> None:
+            events.append("disconnected")
+
+        def controller_reconnected(self, ctrl: Controller) -> None:
+            events.append("reconnected")
+            reconnected.set()
+
+        def controller_update(self, ctrl: Controller) -> None:
+            events.append("update")
+
+        def zone_update(self, ctrl: Controller, zone) -> None:
+            events.append("zone")
+
+        def power_update(self, ctrl: Controller) -> None:
+            events.append("power")
+
+    service.add_listener(OrderListener())
+    controller._failed_connection(ConnectionError("Fake connection error"))
+    service._process_datagram(
+        b"ASPort_12107,Mac_000000001,IP_8.8.8.8,iZone,iLight,iDrate", ("8.8.8.8", 12107)
+    )
+    await wait_for(reconnected.wait(), 1)
+
+    # Listeners get the refreshed state before hearing about the reconnect.
+    zones = ["zone"] * len(controller.zones)
+    assert events == ["disconnected", "update", *zones, "power", "reconnected"]
+
+
+async def test_refresh_coalesced(service):
+    controller = service.controllers["000000001"]  # type: Controller
+    release = Event()
+    followed_up = Event()
+    calls = []
+
+    async def refresh_zones():
+        calls.append(None)
+        if len(calls) == 2:
+            followed_up.set()
+        await release.wait()
+
+    controller._refresh_zones = refresh_zones
+
+    for _ in range(3):
+        service._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
+    await sleep(0)
+
+    assert len(calls) == 1
+
+    release.set()
+    await wait_for(followed_up.wait(), 1)
+
+    # The burst is collapsed into a single follow-up refresh.
+    assert len(calls) == 2
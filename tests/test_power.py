@@ -0,0 +1,105 @@
+"""Tests for power monitoring"""
+
+import json
+
+from pizone import BatteryLevel, Power, PowerGroup
+
+
+def _config():
+    return {
+        "Enabled": 1,
+        "Voltage": 240,
+        "PF": 95,
+        "CostOfPower": 2500,
+        "Emissions": 800,
+        "Devices": [
+            {
+                "Enabled": int(dev < 2),
+                "Channels": [
+                    {
+                        "Name": f"Circuit {dev}.{chan}",
+                        "GrNo": dev + 1 if chan == 0 and dev < 2 else 255,
+                        "Generate": int(dev == 1),
+                        "Enabled": 1,
+                        "AddToTotal": 1,
+                    }
+                    for chan in range(3)
+                ],
+            }
+            for dev in range(5)
+        ],
+    }
+
+
+def _status(reading, power):
+    return {
+        "LastReadingNo": reading,
+        "Dev": [
+            {
+                "Ok": 1,
+                "Batt": BatteryLevel.NORMAL,
+                "Ch": [{"Pwr": power + dev * 3 + chan} for chan in range(3)],
+            }
+            for dev in range(5)
+        ],
+    }
+
+
+class MockController:
+    def __init__(self) -> None:
+        self.config = _config()
+        self.status = _status(1, 100)
+
+    async def _send_command_async(self, command, data):
+        assert command == "PowerRequest"
+        if data["PowerRequest"]["Type"] == 1:
+            return json.dumps({"PowerMonitorConfig": self.config})
+        return json.dumps({"PowerMonitorStatus": self.status})
+
+
+async def test_power():
+    ctrl = MockController()
+    power = Power(ctrl)
+    await power.init()
+
+    assert power.enabled
+    assert power.voltage == 240
+
+    assert power.devices[0].enabled
+    assert not power.devices[4].enabled
+
+    chan = power.devices[1].channels[0]
+    assert chan.name == "Circuit 1.0"
+    assert chan.group_number == 2
+    assert chan.generate
+    assert power.devices[1].channels[1].group_number is None
+
+    assert [g.group_number for g in power.groups] == [1, 2]
+    assert power.groups[1].name == "Circuit 1.0"
+
+    assert await power.refresh()
+    assert chan.status_power == 103
+    assert power.devices[1].status_ok
+    assert power.devices[1].status_batt is BatteryLevel.NORMAL
+    assert power.groups[1].status_power == 103
+    assert power.groups[1].status_ok
+
+    # Same reading number, nothing changes
+    assert not await power.refresh()
+
+    ctrl.status = _status(2, 200)
+    ctrl.status["Dev"][1]["Ok"] = 0
+    assert await power.refresh()
+    assert chan.status_power == 203
+    assert not power.groups[1].status_ok
+
+
+async def test_power_group_from_iterator():
+    power = Power(MockController())
+    await power.init()
+
+    channels = power.devices[0].channels
+    group = PowerGroup(power, iter(channels))
+
+    assert group.name == channels[0].name
+    assert group._devices == (power.devices[0],)
@@ -0,0 +1,143 @@
+"""Tests for zones"""
+
+from asyncio import Event, wait_for
+
+from pizone import Listener, Zone
+from pizone.discovery import CHANGED_ZONES
+from pytest import mark, raises
+
+
+async def test_zone_state(service):
+    controller = service.controllers["000000001"]
+    living, spill = controller.zones[0], controller.zones[7]
+
+    assert living.name == "LIVING"
+    assert living.type == Zone.Type.AUTO
+    assert living.mode == Zone.Mode.AUTO
+    assert living.temp_setpoint == 20.5
+    assert spill.type == Zone.Type.CONST
+
+    snap = living.snapshot()
+    assert snap["Name"] == living.name
+    assert snap["SetPoint"] == living.temp_setpoint
+
+    await living.set_mode(Zone.Mode.CLOSE)
+    assert controller.sent[-1][0] == "ZoneCommand"
+    assert living.mode == Zone.Mode.CLOSE
+
+    await living.set_temp_setpoint(22.0)
+    assert living.mode == Zone.Mode.AUTO
+    assert living.temp_setpoint == 22.0
+
+    with raises(AttributeError):
+        await living.set_temp_setpoint(22.2)
+    with raises(AttributeError):
+        await living.set_temp_setpoint(40.0)
+    with raises(AttributeError):
+        await spill.set_temp_setpoint(22.0)
+    with raises(AttributeError):
+        await spill.set_mode(Zone.Mode.AUTO)
+
+
+@mark.parametrize(
+    "method,value",
+    [
+        ("set_airflow_min", 41),
+        ("set_airflow_min", -1),
+        ("set_airflow_min", 105),
+        ("set_airflow_max", 41),
+        ("set_airflow_max", -1),
+        ("set_airflow_max", 105),
+    ],
+)
+async def test_zone_airflow_invalid(service, method, value):
+    controller = service.controllers["000000001"]
+    zone = controller.zones[1]
+
+    with raises(AttributeError):
+        await getattr(zone, method)(value)
+    assert controller.sent == []
+
+
+async def test_zone_refresh(service):
+    controller = service.controllers["000000001"]
+    zone = controller.zones[1]
+
+    updated = Event()
+
+    class ZoneListener(Listener):
+        def zone_update(self, ctrl, changed) -> None:
+            if changed is zone:
+                updated.set()
+
+    service.add_listener(ZoneListener())
+    controller.resources["Zones1_4"][1]["Mode"] = "open"
+    service._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
+    await wait_for(updated.wait(), 1)
+
+    assert zone.mode == Zone.Mode.OPEN
+
+
+async def test_zone_refresh_unchanged(service):
+    controller = service.controllers["000000001"]
+    zone, other = controller.zones[1], controller.zones[2]
+
+    updates = []
+    updated = Event()
+
+    class ZoneListener(Listener):
+        def zone_update(self, ctrl, changed) -> None:
+            updates.append(changed)
+            updated.set()
+
+    service.add_listener(ZoneListener())
+
+    # Only the zone whose data changed is reported.
+    controller.resources["Zones1_4"][2]["Mode"] = "open"
+    service._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
+    await wait_for(updated.wait(), 1)
+    assert updates == [other]
+
+    updated.clear()
+    controller.resources["Zones1_4"][1]["Mode"] = "open"
+    service._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
+    await wait_for(updated.wait(), 1)
+    assert updates == [other, zone]
+
+
+async def test_zone_unknown_mode(service):
+    controller = service.controllers["000000001"]
+    odd, other = controller.zones[1], controller.zones[2]
+
+    updated = Event()
+
+    class ZoneListener(Listener):
+        def zone_update(self, ctrl, zone) -> None:
+            if zone is other:
+                updated.set()
+
+    service.add_listener(ZoneListener())
+    controller.resources["Zones1_4"][1]["Mode"] = "override"
+    controller.resources["Zones1_4"][2]["Mode"] = "open"
+    service._process_datagram(CHANGED_ZONES, ("8.8.8.8", 12107))
+    await wait_for(updated.wait(), 1)
+
+    # Only reads of the zone with the unknown value fail.
+    assert other.mode == Zone.Mode.OPEN
+    with raises(ValueError):
+        odd.mode
+    assert odd.type == Zone.Type.AUTO
+
+
+async def test_zone_disconnected(service):
+    controller = service.controllers["000000001"]
+    zone = controller.zones[0]
+
+    controller._failed_connection(ConnectionError("Fake connection error"))
+
+    with raises(ConnectionError):
+        zone.mode
+    with raises(ConnectionError):
+        zone.name
+    with raises(ConnectionError):
+        zone.snapshot()